@@ -1,6 +1,52 @@
+import functools
 import math
+import warnings
+from contextlib import contextmanager
 from datetime import datetime
 
+import numpy as np
+
+try:
+    from numba import njit
+    _HAVE_NUMBA = True
+except ImportError:  # numba 不可用时内核以纯 Python 运行
+    _HAVE_NUMBA = False
+
+# ω_C 权重因子按残基类型预先建表（文档记录用；两个取值已烘焙进下方特化内核）
+OMEGA_C = {'aliphatic': 0.34, 'aromatic': 0.07}
+
+# ω_C 只有两个取值，为每个取值生成一份特化内核：权重成为编译期常量，
+# 在 fastmath 下可折叠进 FMA
+def _delta_comb_ali(dH, dC):
+    """ω_C=0.34（脂肪族）特化的 ∆δ_comb 标量内核"""
+    return math.sqrt(dH * dH + 0.34 * dC * dC)
+
+def _delta_comb_aro(dH, dC):
+    """ω_C=0.07（芳香族）特化的 ∆δ_comb 标量内核"""
+    return math.sqrt(dH * dH + 0.07 * dC * dC)
+
+if _HAVE_NUMBA:
+    _delta_comb_ali = njit(cache=True, fastmath=True)(_delta_comb_ali)
+    _delta_comb_aro = njit(cache=True, fastmath=True)(_delta_comb_aro)
+
+def _batch_ali(dH, dC):
+    """ω_C=0.34 特化的向量内核"""
+    return np.sqrt(dH * dH + 0.34 * dC * dC)
+
+def _batch_aro(dH, dC):
+    """ω_C=0.07 特化的向量内核"""
+    return np.sqrt(dH * dH + 0.07 * dC * dC)
+
+_DELTA_COMB_KERNELS = {'aliphatic': _delta_comb_ali, 'aromatic': _delta_comb_aro}
+_BATCH_KERNELS = {'aliphatic': _batch_ali, 'aromatic': _batch_aro}
+
+@functools.lru_cache(maxsize=1024)
+def _calculate_delta_comb_inner(H1, C1, H2, C2, kernel):
+    """特化内核已选好的标量计算路径（ω_H 恒为 1.00）；重复查询直接走缓存"""
+    delta_H = abs(H2 - H1)
+    delta_C = abs(C2 - C1)
+    return kernel(delta_H, delta_C), delta_H, delta_C
+
 def calculate_delta_comb(H1, C1, H2, C2, residue_type):
     """
     Calculate combined chemical shift perturbation (∆δ_comb) from two chemical shift states.
@@ -18,36 +64,42 @@ def calculate_delta_comb(H1, C1, H2, C2, residue_type):
     ∆δ_comb = √(ω_H * (∆δ_H)^2 + ω_C * (∆δ_C)^2)
     where ω_H = 1.00, ω_C = 0.34 for aliphatic or 0.07 for aromatic.
     """
-    # 计算化学位移变化
-    delta_H = abs(H2 - H1)
-    delta_C = abs(C2 - C1)
-    
-    # 设置权重因子
-    omega_H = 1.00
-    residue_type = residue_type.lower()
-    if residue_type == 'aliphatic':
-        omega_C = 0.34
-    elif residue_type == 'aromatic':
-        omega_C = 0.07
+    # 单次字典查找选定特化内核，未知类型统一转译为 ValueError
+    try:
+        kernel = _DELTA_COMB_KERNELS[residue_type.lower()]
+    except KeyError:
+        raise ValueError("residue_type must be either 'aliphatic' or 'aromatic'") from None
+    return _calculate_delta_comb_inner(H1, C1, H2, C2, kernel)
+
+@contextmanager
+def open_results(filename, mode='a'):
+    """打开结果文件并在退出时关闭；批量写入时整个批次只需一次 open/close"""
+    f = open(filename, mode, encoding='utf-8')
+    try:
+        yield f
+    finally:
+        f.close()
+
+def save_results_to_file(H1, C1, H2, C2, residue_type, delta_H, delta_C, delta_comb,
+                         filename="nmr_results.txt", fh=None):
+    """保存计算结果到文件；传入已打开的 fh 可避免每条记录的 open/close 开销"""
+    # 先拼好整段文本再一次写入，避免每条记录多次进出 I/O 层
+    lines = [
+        "="*50 + "\n",
+        f"计算时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n",
+        f"状态1: 1H={H1} ppm, 13C={C1} ppm\n",
+        f"状态2: 1H={H2} ppm, 13C={C2} ppm\n",
+        f"残基类型: {residue_type}\n",
+        f"Δδ_H = {delta_H:.4f} ppm\n",
+        f"Δδ_C = {delta_C:.4f} ppm\n",
+        f"Δδ_comb = {delta_comb:.4f} ppm\n",
+        "="*50 + "\n\n",
+    ]
+    if fh is not None:
+        fh.write(''.join(lines))
     else:
-        raise ValueError("residue_type must be either 'aliphatic' or 'aromatic'")
-    
-    # 计算综合化学位移扰动
-    delta_comb = math.sqrt(omega_H * (delta_H ** 2) + omega_C * (delta_C ** 2))
-    return delta_comb, delta_H, delta_C
-
-def save_results_to_file(H1, C1, H2, C2, residue_type, delta_H, delta_C, delta_comb, filename="nmr_results.txt"):
-    """保存计算结果到文件"""
-    with open(filename, 'a', encoding='utf-8') as f:
-        f.write("="*50 + "\n")
-        f.write(f"计算时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        f.write(f"状态1: 1H={H1} ppm, 13C={C1} ppm\n")
-        f.write(f"状态2: 1H={H2} ppm, 13C={C2} ppm\n")
-        f.write(f"残基类型: {residue_type}\n")
-        f.write(f"Δδ_H = {delta_H:.4f} ppm\n")
-        f.write(f"Δδ_C = {delta_C:.4f} ppm\n")
-        f.write(f"Δδ_comb = {delta_comb:.4f} ppm\n")
-        f.write("="*50 + "\n\n")
+        with open_results(filename) as f:
+            f.write(''.join(lines))
     return filename
 
 def batch_calculate_from_file(filename, residue_type, output_file=None):
@@ -59,32 +111,64 @@ def batch_calculate_from_file(filename, residue_type, output_file=None):
     例如：
     A1 1.2 110 1.25 109.5
     A2 0.9 115 0.92 114.8
+
+    返回 dict，键为 'residue'、'delta_H'、'delta_C'、'delta_comb'，
+    值为对应的 NumPy 数组（按文件中的行顺序）。
     """
-    results = []
-    with open(filename, 'r') as f:
-        for line in f:
-            if line.strip() and not line.startswith('#'):
-                parts = line.strip().split()
-                if len(parts) >= 5:
-                    residue_id = parts[0]
-                    H1, C1, H2, C2 = map(float, parts[1:5])
-                    delta_comb, delta_H, delta_C = calculate_delta_comb(H1, C1, H2, C2, residue_type)
-                    results.append({
-                        'residue': residue_id,
-                        'delta_H': delta_H,
-                        'delta_C': delta_C,
-                        'delta_comb': delta_comb
-                    })
-    
+    # 整个批量只解析一次残基类型，选定对应的特化向量内核
+    try:
+        batch_kernel = _BATCH_KERNELS[residue_type.lower()]
+    except KeyError:
+        raise ValueError("residue_type must be either 'aliphatic' or 'aromatic'") from None
+
+    try:
+        # 规则文件：一次性批量读入所有列（忽略 loadtxt 对注释行的计数警告）
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            data = np.loadtxt(filename, comments='#', dtype=str, ndmin=2)
+        if data.shape[1] < 5:
+            raise ValueError("expected at least 5 columns")
+        ids = data[:, 0]
+        nums = data[:, 1:5].astype(np.float64)
+    except ValueError:
+        # 行格式不规则（列数不一致等）时退回逐行流式解析；
+        # 限制分词数并提前跳过空行/注释行，减少每行的临时对象
+        id_list, rows = [], []
+        with open(filename, 'r') as f:
+            for line in f:
+                s = line.lstrip()
+                if not s or s[0] == '#':
+                    continue
+                parts = s.split(None, 5)
+                if len(parts) < 5:
+                    continue
+                id_list.append(parts[0])
+                rows.append([float(x) for x in parts[1:5]])
+        ids = np.array(id_list, dtype=str)
+        nums = np.array(rows, dtype=np.float64).reshape(-1, 4)
+
+    # 向量化计算所有残基的化学位移扰动
+    delta_H = np.abs(nums[:, 2] - nums[:, 0])
+    delta_C = np.abs(nums[:, 3] - nums[:, 1])
+    delta_comb = batch_kernel(delta_H, delta_C)
+
     # 如果提供了输出文件名，则保存结果
     if output_file:
-        with open(output_file, 'w') as f:
+        table = np.column_stack([ids,
+                                 np.char.mod('%.4f', delta_H),
+                                 np.char.mod('%.4f', delta_C),
+                                 np.char.mod('%.4f', delta_comb)])
+        with open_results(output_file, 'w') as f:
             f.write("Residue\tΔδ_H(ppm)\tΔδ_C(ppm)\tΔδ_comb(ppm)\n")
-            for res in results:
-                f.write(f"{res['residue']}\t{res['delta_H']:.4f}\t{res['delta_C']:.4f}\t{res['delta_comb']:.4f}\n")
+            np.savetxt(f, table, fmt='%s', delimiter='\t')
         print(f"Results saved to {output_file}")
-    
-    return results
+
+    return {
+        'residue': ids,
+        'delta_H': delta_H,
+        'delta_C': delta_C,
+        'delta_comb': delta_comb
+    }
 
 # 主程序
 if __name__ == "__main__":
@@ -121,13 +205,16 @@ if __name__ == "__main__":
         print(f"残基类型: {residue_type}")
         
         if residue_type.lower() == 'aliphatic':
+            # 各中间量只算一次，展示时复用
+            delta_H2 = delta_H ** 2
+            weighted_C2 = 0.34 * delta_C ** 2
             print("\n验证计算:")
             print(f"Δδ_H = |{H2} - {H1}| = {delta_H:.4f} ppm")
             print(f"Δδ_C = |{C2} - {C1}| = {delta_C:.4f} ppm")
             print(f"Δδ_comb = √(1.00 × ({delta_H:.4f})² + 0.34 × ({delta_C:.4f})²)")
-            print(f"       = √(1.00 × {delta_H**2:.4f} + 0.34 × {delta_C**2:.4f})")
-            print(f"       = √({delta_H**2:.4f} + {0.34*delta_C**2:.4f})")
-            print(f"       = √({delta_H**2 + 0.34*delta_C**2:.4f})")
+            print(f"       = √(1.00 × {delta_H2:.4f} + 0.34 × {delta_C**2:.4f})")
+            print(f"       = √({delta_H2:.4f} + {weighted_C2:.4f})")
+            print(f"       = √({delta_H2 + weighted_C2:.4f})")
             print(f"       = {delta_comb:.4f} ppm")
         
         # 等待用户按键，防止窗口关闭
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""AOT 编译脚本：提前把打分内核编译成本地扩展模块 tpye_kernels。
+
+交互式使用时 numba 的 JIT 预热可能耗时数秒；运行
+
+    python tpye_calculation_aot.py
+
+会在当前目录生成 tpye_kernels 扩展，tpye_calculation 导入时会优先加载它，
+首次查询即为本地代码。注意 pycc 不支持 parallel=True，故 AOT 版本的
+score_batch 为串行编译；需要多核并行时删除生成的扩展即可退回 JIT 内核。
+"""
+from numba.pycc import CC
+
+from tpye_calculation import _score_all_py, _score_batch_py
+
+cc = CC('tpye_kernels')
+
+cc.export(
+    'score_point',
+    'void(f4, f4, f4[:], f4[:], f4[:], f4[:], f4[:], i8[:], f4[:], i8[:])'
+)(_score_all_py)
+cc.export(
+    'score_batch',
+    'void(f4[:], f4[:], f4[:], f4[:], f4[:], f4[:], f4[:], i8[:], f4[:, :], i8[:, :])'
+)(_score_batch_py)
+
+if __name__ == '__main__':
+    cc.compile()